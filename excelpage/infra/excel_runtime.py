@@ -27,20 +27,25 @@ def get_app(*, visible: bool = True, add_book: bool = False):
     xw = _get_xw()
     try:
         if xw.apps and len(xw.apps) > 0:
+            # Count/Grep が使う非表示 Excel は選ばない（ブックが見えない・計算停止のまま開くため）
             app = xw.apps.active
-            if app is not None:
+            if app is not None and app.visible:
                 return app
+            for app in xw.apps:
+                if app.visible:
+                    return app
     except Exception:
         pass
     return xw.App(visible=visible, add_book=add_book)
 
 
 def find_open_book(app, file_path: str):
-    target = os.path.abspath(file_path)
+    # Windows はパスの大文字小文字を区別しないので normcase で比べる
+    target = os.path.normcase(os.path.abspath(file_path))
     try:
         for b in app.books:
             try:
-                if os.path.abspath(b.fullname) == target:
+                if os.path.normcase(os.path.abspath(b.fullname)) == target:
                     return b
             except Exception:
                 continue
@@ -4,6 +4,7 @@ from __future__ import annotations
 import sys
 import json
 import os
+import multiprocessing
 from typing import Dict, Any
 
 from PySide6.QtWidgets import (
@@ -273,4 +274,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
@@ -1,19 +1,113 @@
 # excel_transfer/services/count.py
 import os
-import re
+import itertools
+import zipfile
+from collections import OrderedDict
 import xlwings as xw
-from typing import Tuple, List
+from typing import Tuple, List, Iterable, Iterator, Optional
 from models.dto import CountRequest, LogFn
-from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from openpyxl.utils import get_column_letter
+from utils.excel import FAST_EXTS, quiet_app, open_book_readonly, get_shared_app, run_on_excel_thread
+from utils.parallel import map_files
 
-_A1 = re.compile(r"^\$?([A-Z]+)\$?(\d+)$", re.I)
+# openpyxl で開けないときだけ Excel で読み直す（シート名違いなどはそのままエラーにする）
+_OPENPYXL_LOAD_ERRORS = (InvalidFileException, zipfile.BadZipFile, OSError)
+_MAX_ROW = 1048576
+_MAX_COL = 16384
+# xlwings でスキャンするときに1回の COM 呼び出しで読むセル数
+_SCAN_CHUNK = 2000
+
+# 直近に使った共有 app（作り直されたら xlwings のキャッシュを捨てるため）。
+# _APP と _BOOK_CACHE のブックは共有 Excel 用スレッドだけが触る
+_APP = None
+
+# 1回の run_count の中で同じブックを開き直さないための xlwings ブックキャッシュ（LRU）
+# key: (abspath, mtime_ns)。run_count の終わりに全部閉じる（ユーザーが保存・改名できるように）。
+# openpyxl(read_only) もファイルハンドルを掴むのでキャッシュしない
+_BOOK_CACHE: "OrderedDict[Tuple[str, int], object]" = OrderedDict()
+_BOOK_CACHE_SIZE = 8
+
+def _get_app() -> xw.App:
+    global _APP
+    app = get_shared_app()
+    if app is not _APP:
+        _BOOK_CACHE.clear()  # 旧 app のブックは使えない
+        _APP = app
+    return app
+
+def _close_book(book) -> None:
+    try:
+        book.close()  # ← save引数なし
+    except Exception:
+        pass
+
+def _book_alive(book) -> bool:
+    # Grep など共有 app の他の利用者に閉じられていないか
+    try:
+        book.name
+        return True
+    except Exception:
+        return False
+
+def _evict_book(path: str) -> None:
+    ap = os.path.abspath(path)
+    for key in [k for k in _BOOK_CACHE if k[0] == ap]:
+        _close_book(_BOOK_CACHE.pop(key))
+
+def _cached_book(path: str):
+    """
+    path のブックを共有 app で read_only で開き、LRU キャッシュから返す。
+    更新日時が変わっていれば開き直す。
+    """
+    ap = os.path.abspath(path)
+    key = (ap, os.stat(ap).st_mtime_ns)
+    book = _BOOK_CACHE.get(key)
+    if book is not None and _book_alive(book):
+        _BOOK_CACHE.move_to_end(key)
+        return book
+
+    # 古い版と、同じファイル名の別ブック（Excel は同名ブックを2冊開けない）を閉じる
+    name = os.path.basename(ap).lower()
+    for other in [k for k in _BOOK_CACHE if os.path.basename(k[0]).lower() == name]:
+        _close_book(_BOOK_CACHE.pop(other))
+
+    app = _get_app()
+    book = open_book_readonly(app, ap)
+    quiet_app(app)
+
+    _BOOK_CACHE[key] = book
+    while len(_BOOK_CACHE) > _BOOK_CACHE_SIZE:
+        _, old = _BOOK_CACHE.popitem(last=False)
+        _close_book(old)
+    return book
+
+def _close_cached_books() -> None:
+    while _BOOK_CACHE:
+        _, book = _BOOK_CACHE.popitem(last=False)
+        _close_book(book)
+
+def clear_book_cache() -> None:
+    """キャッシュ中のブックをすべて閉じる（共有 app は起動したまま残す）"""
+    if _BOOK_CACHE:
+        run_on_excel_thread(_close_cached_books)
 
 def _parse_a1(a1: str) -> Tuple[int,int]:
-    m = _A1.match(a1.strip())
-    if not m:
+    """$A$1 / b12 形式を (row, col) に変換（regex を使わず1文字ずつ走査）"""
+    s = a1.strip().upper()
+    n = len(s)
+    i = 1 if n and s[0] == "$" else 0
+    col = 0
+    while i < n and "A" <= s[i] <= "Z":
+        col = col * 26 + ord(s[i]) - 64
+        i += 1
+    if i < n and s[i] == "$":
+        i += 1
+    digits = s[i:]
+    if col == 0 or not (digits.isascii() and digits.isdigit()):
         raise ValueError(f"無効なセル形式: {a1}")
-    c, r = m.group(1), int(m.group(2))
-    return r, column_index_from_string(c.upper())
+    return int(digits), col
 
 def _a1(r: int, c: int) -> str:
     return f"{get_column_letter(c)}{r}"
@@ -25,113 +119,278 @@ def _is_empty(v) -> bool:
         return True
     return False
 
+def _iter_span_xlwings(sht: xw.Sheet, r0: int, c0: int, direction: str, first: int, last: int) -> Iterator:
+    """first..last の位置の値を _SCAN_CHUNK セルずつまとめて読み、1セルずつ返す"""
+    pos = first
+    while pos <= last:
+        end = min(pos + _SCAN_CHUNK - 1, last)
+        if direction == "row":
+            block = sht.range((r0, pos), (r0, end)).options(ndim=1).value
+        else:
+            block = sht.range((pos, c0), (end, c0)).options(ndim=1).value
+        yield from block
+        pos = end + 1
+
+def _iter_line_xlwings(sht: xw.Sheet, r0: int, c0: int, direction: str) -> Iterator:
+    """(r0, c0) から direction 方向へシート端まで値を返す"""
+    if direction == "row":
+        return _iter_span_xlwings(sht, r0, c0, direction, c0, _MAX_COL)
+    return _iter_span_xlwings(sht, r0, c0, direction, r0, _MAX_ROW)
+
 def _count_scan(sht: xw.Sheet, r0: int, c0: int, direction: str, tolerate_blanks: int, append_log: LogFn) -> Tuple[int, int]:
     """
     逐次スキャン。連続空白が tolerate_blanks を超えたら停止。
+    セルは _SCAN_CHUNK 単位の一括読み込みで取得する（1セル1回の COM 呼び出しをしない）。
     戻り値: (長さ, 空白検出回数)
     """
+    return _count_scan_values(_iter_line_xlwings(sht, r0, c0, direction), tolerate_blanks)
+
+def _line_cell(sht: xw.Sheet, r0: int, c0: int, direction: str, pos: int):
+    return sht.api.Cells(r0, pos) if direction == "row" else sht.api.Cells(pos, c0)
+
+def _line_pos(rng, direction: str) -> int:
+    return rng.Column if direction == "row" else rng.Row
+
+def _extend_by_end(sht: xw.Sheet, r0: int, c0: int, direction: str, last: int, tolerate_blanks: int) -> int:
+    """
+    last の次から、空白の連続が tolerate_blanks を超えるまで末尾を伸ばす。
+    未入力（None）の並びは End で一気に飛ばし、入力のある並びだけ一括で読んで _is_empty で判定する
+    （"" を返す数式や空白文字だけのセルも openpyxl 側の _count_jump_values と同じく空白扱い）。
+    """
+    if direction == "row":
+        xl_dir, edge = xw.constants.XlDirection.xlToRight, _MAX_COL
+    else:
+        xl_dir, edge = xw.constants.XlDirection.xlDown, _MAX_ROW
+
+    pos = last + 1
+    blanks_run = 0
+    while pos <= edge:
+        cell = _line_cell(sht, r0, c0, direction, pos)
+        if cell.Value is None:
+            # 次の入力セルへ（無ければシート端に止まる）
+            nxt = _line_pos(cell.End(xl_dir), direction)
+            if nxt >= edge and _line_cell(sht, r0, c0, direction, edge).Value is None:
+                break
+            blanks_run += nxt - pos
+            if blanks_run > tolerate_blanks:
+                break
+            pos = nxt
+        # pos からの入力が続く範囲を End で求めて一括で読む
+        if pos < edge and _line_cell(sht, r0, c0, direction, pos + 1).Value is not None:
+            end = _line_pos(_line_cell(sht, r0, c0, direction, pos).End(xl_dir), direction)
+        else:
+            end = pos
+        for v in _iter_span_xlwings(sht, r0, c0, direction, pos, end):
+            if _is_empty(v):
+                blanks_run += 1
+                if blanks_run > tolerate_blanks:
+                    return last
+            else:
+                blanks_run = 0
+                last = pos
+            pos += 1
+    return last
+
+def _count_jump(sht: xw.Sheet, r0: int, c0: int, direction: str, tolerate_blanks: int, append_log: LogFn) -> Tuple[int, int]:
+    """
+    高速（ジャンプ）。tolerate_blanks==0 のときは End キー相当。
+    >0 のときは、End 到達後も End で次の入力セルへ飛びつつ空白許容分を吸収（簡易）。
+    """
+    xl_dir = xw.constants.XlDirection.xlToRight if direction == "row" else xw.constants.XlDirection.xlDown
+    start = c0 if direction == "row" else r0
+    last = _line_pos(sht.api.Cells(r0, c0).End(xl_dir), direction)
+    if tolerate_blanks > 0:
+        last = _extend_by_end(sht, r0, c0, direction, last, tolerate_blanks)
+    length = last - start + 1
+    warnings = 0  # 空白検出件数は scan より粗く扱う
+    return max(0, length), warnings
+
+# =====================================================
+# openpyxl(read_only) 高速パス
+# =====================================================
+def _iter_line_values(ws, r0: int, c0: int, direction: str) -> Iterator:
+    """
+    (r0, c0) から direction 方向へ値を返す。データ末尾以降は None を無限に返す
+    （Excel 上で空セルを読み続けるのと同じ扱いにするため）。
+    """
+    if direction == "row":
+        rows = ws.iter_rows(min_row=r0, max_row=r0, min_col=c0, values_only=True)
+        vals: Iterable = next(rows, ())
+    else:
+        rows = ws.iter_rows(min_row=r0, min_col=c0, max_col=c0, values_only=True)
+        vals = (row[0] if row else None for row in rows)
+    return itertools.chain(vals, itertools.repeat(None))
+
+def _count_scan_values(vals: Iterator, tolerate_blanks: int) -> Tuple[int, int]:
+    """値の列に対するスキャン判定（xlwings / openpyxl 共通）"""
     blanks_run = 0
     count = 0
     warnings = 0
-    r, c = r0, c0
-    while True:
-        v = sht.range((r, c)).value
+    for v in vals:
         if _is_empty(v):
             blanks_run += 1
-            warnings += 1 if blanks_run == 1 else 0  # 空白始点を警告とカウント
+            warnings += 1 if blanks_run == 1 else 0
             if blanks_run > tolerate_blanks:
                 break
         else:
             blanks_run = 0
         count += 1
-        if direction == "row":
-            c += 1
-        else:
-            r += 1
     return count - 1, warnings
 
-def _count_jump(sht: xw.Sheet, r0: int, c0: int, direction: str, tolerate_blanks: int, append_log: LogFn) -> Tuple[int, int]:
+def _count_jump_values(vals: Iterator, edge: int, tolerate_blanks: int) -> Tuple[int, int]:
     """
-    高速（ジャンプ）。tolerate_blanks==0 のときは End キー相当。
-    >0 のときは、End 到達後に前進しつつ空白許容分を吸収（簡易）。
+    _count_jump と同じ判定を値の列に対して行う（edge はシート端までの相対位置）。
+    End キーは「入力有無（None かどうか）」で止まる位置を決めるのでそれに合わせる。
     """
-    if direction == "row":
-        end = sht.api.Cells(r0, c0).End(xw.constants.XlDirection.xlToRight)
-        last_c = end.Column
-        if tolerate_blanks > 0:
-            c = last_c + 1
-            blanks_run = 0
-            while True:
-                v = sht.range((r0, c)).value
-                if _is_empty(v):
-                    blanks_run += 1
-                    if blanks_run > tolerate_blanks:
-                        break
-                else:
-                    blanks_run = 0
-                    last_c = c
-                c += 1
-        length = last_c - c0 + 1
-        warnings = 0  # 空白検出件数は scan より粗く扱う
-        return max(0, length), warnings
+    if edge <= 0:
+        return 1, 0  # 開始セルがシート端（End しても動かない）
+    cur = next(vals)
+    nxt = next(vals)
+    pos = 1  # nxt の相対位置
+    if cur is not None and nxt is not None:
+        # 連続データの末尾まで
+        last = pos
+        while pos < edge:
+            nxt = next(vals)
+            pos += 1
+            if nxt is None:
+                break
+            last = pos
+        if nxt is not None:
+            nxt = next(vals)
+            pos += 1
     else:
-        end = sht.api.Cells(r0, c0).End(xw.constants.XlDirection.xlDown)
-        last_r = end.Row
-        if tolerate_blanks > 0:
-            r = last_r + 1
-            blanks_run = 0
-            while True:
-                v = sht.range((r, c0)).value
-                if _is_empty(v):
-                    blanks_run += 1
-                    if blanks_run > tolerate_blanks:
-                        break
-                else:
-                    blanks_run = 0
-                    last_r = r
-                r += 1
-        length = last_r - r0 + 1
-        warnings = 0
-        return max(0, length), warnings
+        # 次の入力セルまで（無ければシート端）
+        while nxt is None and pos < edge:
+            nxt = next(vals)
+            pos += 1
+        last = pos
+        nxt = next(vals)
+        pos += 1
+
+    if tolerate_blanks > 0:
+        blanks_run = 0
+        while pos <= edge:
+            if _is_empty(nxt):
+                blanks_run += 1
+                if blanks_run > tolerate_blanks:
+                    break
+            else:
+                blanks_run = 0
+                last = pos
+            nxt = next(vals)
+            pos += 1
+    return max(0, last + 1), 0
+
+def _load_openpyxl(path: str):
+    """openpyxl(read_only) で開く。開けないブックは None（呼び出し側で Excel に回す）"""
+    try:
+        return load_workbook(path, read_only=True, data_only=True)
+    except _OPENPYXL_LOAD_ERRORS:
+        return None
+
+def _count_openpyxl(wb, req: CountRequest, r0: int, c0: int) -> Tuple[str, int, int]:
+    try:
+        ws = wb[req.sheet] if req.sheet else wb.worksheets[0]
+        # 他ツールが書いたブックは <dimension> が "A1" のままのことがあり、信じると末尾を誤る
+        ws.reset_dimensions()
+        vals = _iter_line_values(ws, r0, c0, req.direction)
+        if req.mode == "scan":
+            length, warns = _count_scan_values(vals, req.tolerate_blanks)
+        else:
+            edge = (_MAX_COL - c0) if req.direction == "row" else (_MAX_ROW - r0)
+            length, warns = _count_jump_values(vals, edge, req.tolerate_blanks)
+        return ws.title, length, warns
+    finally:
+        wb.close()
+
+def _count_xlwings(path: str, req: CountRequest, r0: int, c0: int, append_log: LogFn) -> Tuple[str, int, int]:
+    book = _cached_book(path)
+    try:
+        sht = book.sheets[req.sheet] if req.sheet else book.sheets[0]
+        if req.mode == "scan":
+            length, warns = _count_scan(sht, r0, c0, req.direction, req.tolerate_blanks, append_log)
+        else:
+            length, warns = _count_jump(sht, r0, c0, req.direction, req.tolerate_blanks, append_log)
+        return sht.name, length, warns
+    except Exception:
+        _evict_book(path)  # 壊れた/閉じられたブックを次回に持ち越さない
+        raise
+
+# =====================================================
+# ファイル単位の並列実行（openpyxl 分だけ utils.parallel のワーカーで）
+# =====================================================
+CountResult = Tuple[str, str, str, str, int, int]
+
+def _noop_log(msg: str) -> None:
+    pass
+
+def _count_fast_file(path: str, req: CountRequest) -> Tuple[str, Optional[CountResult], Optional[str]]:
+    """
+    .xlsx/.xlsm 1ファイル分の Count。ワーカープロセスから呼ばれるのでトップレベルに置く。
+    戻り値: (path, 結果 or None, エラー文字列)。openpyxl で開けなかったときは
+    (path, None, None) を返し、親プロセスで Excel に回す。
+    """
+    try:
+        r0, c0 = _parse_a1(req.start_cell)
+        wb = _load_openpyxl(path)
+        if wb is None:
+            return path, None, None
+        sheet_name, length, warns = _count_openpyxl(wb, req, r0, c0)
+        return path, (os.path.basename(path), sheet_name, req.direction, _a1(r0, c0), length, warns), ""
+    except Exception as e:
+        return path, None, str(e)
+
+def _count_excel_file(path: str, req: CountRequest) -> Tuple[str, Optional[CountResult], str]:
+    """共有 app とブックキャッシュで1ファイル分の Count（run_on_excel_thread で順に呼ぶ）"""
+    try:
+        r0, c0 = _parse_a1(req.start_cell)
+        sheet_name, length, warns = _count_xlwings(path, req, r0, c0, _noop_log)
+        return path, (os.path.basename(path), sheet_name, req.direction, _a1(r0, c0), length, warns), ""
+    except Exception as e:
+        return path, None, str(e)
+
+def _count_files(paths: List[str], req: CountRequest) -> List[Tuple[str, Optional[CountResult], str]]:
+    """
+    .xlsx/.xlsm はプロセス並列で読み、Excel が要るものは親プロセスで順に読む
+    （ワーカーごとに Excel を起動せず、共有 app とブックキャッシュを使うため）。結果は paths の順。
+    """
+    fast = [p for p in paths if p.lower().endswith(FAST_EXTS)]
+    fast_results = map_files(_count_fast_file, fast, req)
+    results = []
+    for path in paths:
+        if path.lower().endswith(FAST_EXTS):
+            res = next(fast_results)
+            if res[1] is None and res[2] is None:
+                res = run_on_excel_thread(_count_excel_file, path, req)
+        else:
+            res = run_on_excel_thread(_count_excel_file, path, req)
+        results.append(res)
+    return results
 
 def run_count(req: CountRequest, ctx, logger, append_log: LogFn) -> str:
     append_log("=== Count開始 ===")
-    results = []
+    paths = []
     for path in req.files:
         if not os.path.exists(path):
             append_log(f"[ERR] ファイルなし: {path}")
             continue
+        paths.append(path)
 
-        app = None
-        book = None
-        try:
-            app = xw.App(visible=False, add_book=False)
-            book = app.books.open(path, read_only=True)
+    try:
+        file_results = _count_files(paths, req)
+    finally:
+        clear_book_cache()
 
-            sht = book.sheets[req.sheet] if req.sheet else book.sheets[0]
-            r0, c0 = _parse_a1(req.start_cell)
-
-            if req.mode == "scan":
-                length, warns = _count_scan(sht, r0, c0, req.direction, req.tolerate_blanks, append_log)
-            else:
-                length, warns = _count_jump(sht, r0, c0, req.direction, req.tolerate_blanks, append_log)
-
-            results.append((os.path.basename(path), sht.name, req.direction, _a1(r0, c0), length, warns))
-            if warns > 0:
-                append_log(f"[WARN] {os.path.basename(path)}:{sht.name} {req.start_cell} で空白を検出（{warns}件）")
-        except Exception as e:
-            append_log(f"[ERR] Count失敗: {path} ({e})")
-        finally:
-            try:
-                if book:
-                    book.close()  # ← save引数なし
-            except Exception:
-                pass
-            try:
-                if app:
-                    app.kill()
-            except Exception:
-                pass
+    results = []
+    for path, res, err in file_results:
+        if res is None:
+            append_log(f"[ERR] Count失敗: {path} ({err})")
+            continue
+        results.append(res)
+        fn, sheet_name, _, _, _, warns = res
+        if warns > 0:
+            append_log(f"[WARN] {fn}:{sheet_name} {req.start_cell} で空白を検出（{warns}件）")
 
     # サマリ出力
     for fn, sh, d, start, length, warns in results:
@@ -21,6 +21,7 @@ from PySide6.QtGui import QStandardItemModel, QStandardItem
 from PySide6.QtCore import Qt, QPoint, QModelIndex
 
 from logger import get_logger
+from infra.excel_runtime import get_app
 
 logger = get_logger("DiffDialog")
 
@@ -29,15 +30,8 @@ logger = get_logger("DiffDialog")
 # Excel Jump (xlwings)
 # =====================================================
 def _get_or_create_app() -> xw.App:
-    try:
-        if xw.apps and len(xw.apps) > 0:
-            app = xw.apps.active
-            if app is not None:
-                return app
-    except Exception as ex:
-        logger.warning("[JUMP] reuse active app failed: %s", ex)
-
-    return xw.App(visible=True, add_book=False)
+    # 表示中の既存Excelを優先して使う（選び方は get_app に集約）
+    return get_app(visible=True, add_book=False)
 
 
 def _find_open_book(app: xw.App, file_path: str) -> Optional[xw.Book]:
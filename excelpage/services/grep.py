@@ -1,10 +1,18 @@
 import os
 import xlwings as xw
-from typing import Tuple, List
+from typing import Tuple, List, Iterator
+from openpyxl import load_workbook
 from models.dto import GrepRequest, LogFn
 from utils.search_utils import compile_matcher
+from utils.excel import FAST_EXTS, quiet_app, open_book_readonly, get_shared_app, close_same_name_books, run_on_excel_thread
+from infra.excel_runtime import find_open_book
+from utils.parallel import map_files
 
 EXCEL_EXTS = (".xlsx", ".xlsm", ".xlsb", ".xls")
+# [HIT] ログはこの件数ずつまとめて append_log に渡す（UI 更新を1件ごとに行わない）
+LOG_FLUSH = 500
+# used_range を一括で読むと巨大シートで COM タイムアウト/メモリ膨張するため行単位で分割
+CHUNK_ROWS = 10000
 
 def _find_excel_files(root: str) -> List[str]:
     hits = []
@@ -14,6 +22,107 @@ def _find_excel_files(root: str) -> List[str]:
                 hits.append(os.path.join(dp, fn))
     return hits
 
+def _iter_used_rows(sht: xw.Sheet):
+    """used_range を CHUNK_ROWS 行ずつ読み、(行番号, 先頭列, 行の値リスト) を返す"""
+    vr = sht.used_range
+    r1, c1 = vr.row, vr.column
+    last = vr.last_cell
+    r2, c2 = last.row, last.column
+    for r_start in range(r1, r2 + 1, CHUNK_ROWS):
+        r_end = min(r_start + CHUNK_ROWS - 1, r2)
+        block = sht.range((r_start, c1), (r_end, c2)).options(ndim=2).value
+        for r, row in enumerate(block, start=r_start):
+            yield r, c1, row
+
+def _iter_book_rows_xlwings(book) -> Iterator[Tuple[str, int, int, list]]:
+    """(シート名, 行番号, 先頭列, 行の値リスト) を返す"""
+    for sht in book.sheets:
+        for r, c1, row in _iter_used_rows(sht):
+            yield sht.name, r, c1, row
+
+def _iter_book_rows_openpyxl(path: str) -> Iterator[Tuple[str, int, int, list]]:
+    """openpyxl(read_only) で全シートを1行ずつストリーミングし、xlwings 版と同じ形で返す"""
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            # 他ツールが書いたブックは <dimension> が "A1" のままのことがあり、信じると1セルしか読まない
+            ws.reset_dimensions()
+            for r, row in enumerate(ws.iter_rows(values_only=True), start=1):
+                yield ws.title, r, 1, row
+    finally:
+        wb.close()
+
+def _iter_hits(rows: Iterator[Tuple[str, int, int, list]], matcher) -> Iterator[Tuple[str, int, int, str]]:
+    """(シート名, 行, 列, 値の先頭60文字) を一致セルごとに返す"""
+    for sheet_name, r, c1, row in rows:
+        if row.count(None) == len(row):
+            continue  # 空行は C 側の count で判定して matcher 呼び出しを省く
+        for c, v in enumerate(row, start=c1):
+            if type(v) is int:
+                v = float(v)  # openpyxl の int を Excel(xlwings) と同じ float に揃える（100 → "100.0"）
+            if matcher(v):
+                yield sheet_name, r, c, str(v)[:60]
+
+def _grep_file_openpyxl(path: str, keyword: str, use_regex: bool, ignore_case: bool) -> Tuple[str, List[Tuple[str, int, int, str]], str]:
+    """
+    1ファイル分の Grep（ワーカープロセスから呼ばれるのでトップレベル、matcher もここで作る）。
+    戻り値: (path, ヒット一覧, エラー文字列)。途中で失敗してもそこまでのヒットは返す。
+    """
+    hits: List[Tuple[str, int, int, str]] = []
+    try:
+        matcher = compile_matcher(keyword, use_regex, ignore_case)
+        for hit in _iter_hits(_iter_book_rows_openpyxl(path), matcher):
+            hits.append(hit)
+        return path, hits, ""
+    except Exception as e:
+        return path, hits, str(e)
+
+def _grep_file_xlwings(path: str, matcher) -> Tuple[List[Tuple[str, int, int, str]], str]:
+    """共有の非表示 Excel で1ファイル分の Grep（run_on_excel_thread から呼ぶ）。戻り値: (ヒット一覧, エラー文字列)"""
+    hits: List[Tuple[str, int, int, str]] = []
+    book = None
+    opened = False
+    try:
+        app = get_shared_app()
+        # Count のキャッシュなどで既に開いているブックはそのまま使い、閉じない
+        book = find_open_book(app, path)
+        if book is None:
+            close_same_name_books(app, path)
+            book = open_book_readonly(app, path)
+            opened = True
+        quiet_app(app)
+        for hit in _iter_hits(_iter_book_rows_xlwings(book), matcher):
+            hits.append(hit)
+        return hits, ""
+    except Exception as e:
+        return hits, str(e)
+    finally:
+        try:
+            if opened:
+                book.close()
+        except Exception:
+            pass
+
+def _flush_log(buf: List[str], append_log: LogFn) -> None:
+    if buf:
+        append_log("\n".join(buf))
+        buf.clear()
+
+def _buffer_hit(buf: List[str], append_log: LogFn, fn: str, sheet_name: str, r: int, c: int, text: str) -> None:
+    buf.append(f"[HIT] {fn}[{sheet_name}!R{r}C{c}] {text}")
+    if len(buf) >= LOG_FLUSH:
+        _flush_log(buf, append_log)
+
+def _log_file_hits(buf: List[str], append_log: LogFn, path: str, hits: List[Tuple[str, int, int, str]], err: str) -> int:
+    """1ファイル分のヒットと失敗をログに出し、ヒット件数を返す"""
+    fn = os.path.basename(path)
+    for sheet_name, r, c, text in hits:
+        _buffer_hit(buf, append_log, fn, sheet_name, r, c, text)
+    _flush_log(buf, append_log)
+    if err:
+        append_log(f"[WARN] Grep失敗: {path} ({err})")
+    return len(hits)
+
 def run_grep(req: GrepRequest, ctx, logger, append_log: LogFn) -> Tuple[str, int]:
     append_log("=== Grep開始 ===")
     if not os.path.isdir(req.root_dir):
@@ -21,40 +130,21 @@ def run_grep(req: GrepRequest, ctx, logger, append_log: LogFn) -> Tuple[str, int
 
     files = _find_excel_files(req.root_dir)
     total = 0
+    log_buf: List[str] = []
     matcher = compile_matcher(req.keyword, req.use_regex, req.ignore_case)
 
+    # .xlsx/.xlsm は Excel を使わずプロセス並列で読み、結果は os.walk の順に受け取る
+    fast = [p for p in files if p.lower().endswith(FAST_EXTS)]
+    fast_results = map_files(_grep_file_openpyxl, fast, req.keyword, req.use_regex, req.ignore_case)
     for path in files:
-        app = None
-        book = None
-        try:
-            app = xw.App(visible=False, add_book=False)
-            book = app.books.open(path, read_only=True)
-            for sht in book.sheets:
-                vr = sht.used_range
-                vals = vr.value
-                if vals is None:
-                    continue
-                if not isinstance(vals, list):
-                    vals = [[vals]]
-                for r, row in enumerate(vals, start=vr.row):
-                    if not isinstance(row, list):
-                        row = [row]
-                    for c, v in enumerate(row, start=vr.column):
-                        if matcher(v):
-                            total += 1
-                            append_log(f"[HIT] {os.path.basename(path)}[{sht.name}!R{r}C{c}] {str(v)[:60]}")
-        except Exception as e:
-            append_log(f"[WARN] Grep失敗: {path} ({e})")
-        finally:
-            try:
-                if book:
-                    book.close()
-            except Exception:
-                pass
-            try:
-                if app:
-                    app.kill()
-            except Exception:
-                pass
+        if path.lower().endswith(FAST_EXTS):
+            _, hits, err = next(fast_results)
+            if err:
+                # openpyxl で読めないブックは従来どおり Excel で読み直す
+                hits, err = run_on_excel_thread(_grep_file_xlwings, path, matcher)
+        else:
+            # それ以外は共有の非表示 Excel で開く（app は使い回すので kill しない）
+            hits, err = run_on_excel_thread(_grep_file_xlwings, path, matcher)
+        total += _log_file_hits(log_buf, append_log, path, hits, err)
 
     return (req.root_dir, total)
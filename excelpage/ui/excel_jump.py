@@ -6,20 +6,12 @@ from typing import Optional
 
 import xlwings as xw
 
+from infra.excel_runtime import get_app
 
-def _get_or_create_app(logger) -> xw.App:
-    # 既存Excelを優先して使う（新規乱立を避ける）
-    try:
-        if xw.apps and len(xw.apps) > 0:
-            app = xw.apps.active
-            if app is not None:
-                logger.debug("[JUMP] reuse active excel app")
-                return app
-    except Exception as ex:
-        logger.warning("[JUMP] xw.apps.active failed: %s", ex)
 
-    logger.info("[JUMP] create new excel app")
-    return xw.App(visible=True, add_book=False)
+def _get_or_create_app(logger) -> xw.App:
+    # 表示中の既存Excelを優先して使う（新規乱立を避ける。選び方は get_app に集約）
+    return get_app(visible=True, add_book=False)
 
 
 def _find_open_book(app: xw.App, file_path: str, logger) -> Optional[xw.Book]:
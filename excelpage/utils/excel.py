@@ -1,18 +1,174 @@
 # excel_transfer/utils/excel.py
 import os, glob
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 import xlwings as xw
 
+# openpyxl(read_only) で Excel を起動せずに読める拡張子。.xls/.xlsb は xlwings 経由
+FAST_EXTS = (".xlsx", ".xlsm")
+
 def open_app():
     return xw.App(visible=False, add_book=False)
 
+def quiet_app(app):
+    """
+    読み取り専用セッション向けに描画・警告・イベント・自動再計算を止める。
+    起動直後に呼べば open 時のイベント（Workbook_Open 等）も抑止できる。
+    Calculation はブックが1冊も無いと設定できないため、open 後にも呼ぶこと。
+    非 Windows バックエンドでは未対応の項目があるので個別に握りつぶす。
+    設定は元に戻さない（共有 app はこの状態のまま使い続ける。下の共有 app の説明を参照）。
+    """
+    try:
+        app.display_alerts = False
+    except Exception:
+        pass
+    try:
+        app.screen_updating = False
+    except Exception:
+        pass
+    try:
+        app.api.EnableEvents = False
+    except Exception:
+        pass
+    try:
+        app.api.Calculation = -4135  # xlCalculationManual
+    except Exception:
+        pass
+
+def open_book_readonly(app, path: str):
+    """
+    外部リンク更新・読み取り専用推奨ダイアログ・マクロ自動実行・MRU 追加を止めて
+    読み取り専用で開く（大きな連携ブックでは open 自体の時間が支配的になるため）。
+    """
+    try:
+        app.api.AskToUpdateLinks = False
+    except Exception:
+        pass
+    try:
+        app.api.AutomationSecurity = 3  # msoAutomationSecurityForceDisable
+    except Exception:
+        pass
+    return app.books.open(
+        path,
+        read_only=True,
+        update_links=False,
+        ignore_read_only_recommended=True,
+        notify=False,
+        add_to_mru=False,
+    )
+
+def close_same_name_books(app, path: str):
+    """path と同じファイル名の別ブックを閉じる（Excel は同名ブックを2冊開けない）"""
+    name = os.path.basename(path).lower()
+    target = os.path.normcase(os.path.abspath(path))
+    try:
+        books = list(app.books)
+    except Exception:
+        return
+    for b in books:
+        try:
+            if b.name.lower() == name and os.path.normcase(os.path.abspath(b.fullname)) != target:
+                b.close()
+        except Exception:
+            pass
+
 def safe_kill(app):
     try:
         app.kill()
     except Exception:
         pass
 
+# サービス共通の非表示 Excel（Count / Grep の連続実行で起動コストを払わないため）。
+# COM のプロキシは作ったスレッドでしか使えないので、app とそのブックは専用スレッド1本だけが触る
+# （ExcelWorker と同じ方針）。サービスは run_on_excel_thread 経由で使う。
+# この app は quiet_app / open_book_readonly の設定（イベント停止・手動計算・マクロ無効）のまま
+# プロセス終了まで残す。非表示で read_only のブックしか開かず保存もしないこと、
+# ジャンプ系（infra.excel_runtime.get_app）が非表示の Excel を選ばないことから、
+# ユーザーのブックがこの設定で開かれることはないので、実行ごとに戻すことはしない。
+_SHARED_APP = None
+_EXCEL_Q: "queue.Queue" = queue.Queue()
+_EXCEL_THREAD: Optional[threading.Thread] = None
+_EXCEL_THREAD_LOCK = threading.Lock()
+# 終了時の kill 待ち（長い COM 呼び出し中でも終了を止めない）
+_KILL_TIMEOUT_SEC = 10
+
+def _excel_thread_main() -> None:
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+    except Exception:
+        pass
+    while True:
+        fn, args, fut = _EXCEL_Q.get()
+        if not fut.set_running_or_notify_cancel():
+            continue
+        try:
+            fut.set_result(fn(*args))
+        except BaseException as e:
+            fut.set_exception(e)
+
+def _on_excel_thread() -> bool:
+    return _EXCEL_THREAD is not None and threading.current_thread() is _EXCEL_THREAD
+
+def _submit_excel(fn, args) -> Future:
+    global _EXCEL_THREAD
+    with _EXCEL_THREAD_LOCK:
+        if _EXCEL_THREAD is None:
+            # daemon: atexit の kill_shared_app まで生かしておく
+            _EXCEL_THREAD = threading.Thread(target=_excel_thread_main, name="SharedExcel", daemon=True)
+            _EXCEL_THREAD.start()
+    fut: Future = Future()
+    _EXCEL_Q.put((fn, args, fut))
+    return fut
+
+def run_on_excel_thread(fn, *args):
+    """fn(*args) を共有 Excel 用のスレッドで実行して結果を返す（どの QThread から呼んでもよい）"""
+    if _on_excel_thread():
+        return fn(*args)
+    return _submit_excel(fn, args).result()
+
+def _app_alive(app) -> bool:
+    try:
+        len(app.books)
+        return True
+    except Exception:
+        return False
+
+def get_shared_app():
+    """共有の非表示 Excel を返す。落ちていれば作り直す（run_on_excel_thread の中で呼ぶこと）"""
+    global _SHARED_APP
+    if not _on_excel_thread():
+        raise RuntimeError("get_shared_app は run_on_excel_thread の中で呼ぶこと")
+    if _SHARED_APP is None or not _app_alive(_SHARED_APP):
+        if _SHARED_APP is not None:
+            safe_kill(_SHARED_APP)
+        _SHARED_APP = open_app()
+        quiet_app(_SHARED_APP)
+    return _SHARED_APP
+
+def _kill_shared_app_now() -> None:
+    global _SHARED_APP
+    if _SHARED_APP is not None:
+        safe_kill(_SHARED_APP)
+        _SHARED_APP = None
+
+def kill_shared_app():
+    if _EXCEL_THREAD is None:
+        return
+    if _on_excel_thread():
+        _kill_shared_app_now()
+        return
+    try:
+        _submit_excel(_kill_shared_app_now, ()).result(timeout=_KILL_TIMEOUT_SEC)
+    except Exception:
+        pass
+
+atexit.register(kill_shared_app)
+
 def list_excel_files(root: Path) -> List[Path]:
     exts = ("*.xlsx","*.xlsm","*.xlsb","*.xls")
     files: List[Path] = []
@@ -0,0 +1,32 @@
+# excel_transfer/utils/parallel.py
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterator, List
+
+# openpyxl で読むファイルのプロセス並列（XML 解析は CPU バウンドのため）。
+# Excel(COM) を使う処理はワーカーに回さない（ワーカーごとに Excel を起動することになるため）
+MAX_WORKERS = 4
+# ワーカー起動（spawn + main の再 import）は1回数百 ms かかるので、少数ファイルは逐次の方が速い
+MIN_PARALLEL_FILES = 4
+
+def map_files(fn: Callable, paths: List[str], *args) -> Iterator:
+    """
+    fn(path, *args) をファイルごとに実行し、paths の順に結果を返す。
+    fn はワーカーから呼ばれるのでトップレベル関数であること。
+    プールは呼び出しごとに作って終わったら閉じる（ワーカーを常駐させない）。
+    ワーカーが落ちたら残りを逐次で処理する。
+    """
+    reps = [itertools.repeat(a) for a in args]
+    if len(paths) < MIN_PARALLEL_FILES:
+        yield from map(fn, paths, *reps)
+        return
+
+    done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=min(MAX_WORKERS, len(paths))) as ex:
+            for res in ex.map(fn, paths, *reps):
+                done += 1
+                yield res
+    except BrokenProcessPool:
+        yield from map(fn, paths[done:], *reps)